@@ -1,5 +1,207 @@
+import numba
 import numpy as np
 from enum import Enum
+from typing import Optional
+
+
+_BOX_INDICES = np.arange(1, 101, dtype=np.int8)
+_BOX_INDICES.setflags(write=False)
+
+_RNG = np.random.default_rng()
+
+_NUM_CHUNKS = 256
+
+
+def seed(value: int) -> None:
+    """
+    re-seeds the generator behind Room shuffles and PrisonerStrategy's random
+    draws, so that rooms and draws can be repeated (e.g. in tests). it does not
+    reach monte_carlo_test, whose compiled kernels take their own random_seed.
+
+    :param value: seed for a fresh PCG64 stream
+    """
+
+    _RNG.bit_generator.state = np.random.PCG64(value).state
+
+
+@numba.njit(numba.int64(numba.int8[:], numba.boolean[:], numba.int64), cache=True)
+def _follower_run(values: np.ndarray, opened: np.ndarray, start: int) -> int:
+    """
+    compiled follower strategy for a single prisoner: opens the box matching
+    the last ticket drawn, starting from the prisoner's own number. the box
+    numbers are not bounds-checked, callers must pass a start within 1-100.
+
+    :param values: ticket values of the room, box i+1 stored at index i
+    :param opened: opened status of the room's boxes, updated in place
+    :param start: the prisoner's number
+    :return: 1 on success, 0 on failure, or minus the box number if the
+             prisoner came across a box that was already opened
+    """
+
+    current = start
+    for _ in range(50):
+        index = current - 1
+        if opened[index]:
+            return -current
+        opened[index] = True
+        current = values[index]
+        if current == start:
+            return 1
+    return 0
+
+
+@numba.njit(numba.void(numba.int8[:]), cache=True)
+def _shuffle_room(values: np.ndarray) -> None:
+    """
+    compiled fisher-yates shuffle of a room's ticket values, in place.
+
+    :param values: ticket values of the room, box i+1 stored at index i
+    """
+
+    # scaling a 53-bit uniform draw is cheaper than np.random.randint here
+    # and its bias is far below sampling noise
+    for i in range(99, 0, -1):
+        j = int(np.random.random() * (i + 1))
+        values[i], values[j] = values[j], values[i]
+
+
+@numba.njit(numba.boolean(numba.uint64, numba.uint64, numba.int64), cache=True)
+def _is_marked(low: int, high: int, index: int) -> bool:
+    """
+    reads a box's flag from a 100-box bitmask split over two uint64 words,
+    low holding boxes 1-64 and high boxes 65-100.
+
+    :param low: flags of boxes 1-64, one bit per box
+    :param high: flags of boxes 65-100
+    :param index: box number minus one
+    :return: whether the box's flag is set
+    """
+
+    if index < 64:
+        return (low >> np.uint64(index)) & np.uint64(1) != 0
+    return (high >> np.uint64(index - 64)) & np.uint64(1) != 0
+
+
+@numba.njit(numba.types.UniTuple(numba.uint64, 2)(numba.uint64, numba.uint64, numba.int64), cache=True)
+def _mark(low: int, high: int, index: int) -> tuple:
+    """
+    sets a box's flag in a 100-box bitmask, see _is_marked.
+
+    :param low: flags of boxes 1-64, one bit per box
+    :param high: flags of boxes 65-100
+    :param index: box number minus one
+    :return: the updated (low, high) words
+    """
+
+    if index < 64:
+        return low | np.uint64(1) << np.uint64(index), high
+    return low, high | np.uint64(1) << np.uint64(index - 64)
+
+
+@numba.njit(numba.boolean(numba.int8[:]), cache=True)
+def _follower_trial_success(values: np.ndarray) -> bool:
+    """
+    decides a whole follower run from the room's cycle structure: every prisoner
+    finds his ticket exactly when no cycle of the permutation is longer than 50.
+
+    :param values: ticket values of the room, box i+1 stored at index i
+    :return: True if all 100 prisoners would succeed
+    """
+
+    low = np.uint64(0)  # visited flags, see _is_marked
+    high = np.uint64(0)
+    for start in range(100):
+        index = start
+        length = 0
+        while not _is_marked(low, high, index):
+            low, high = _mark(low, high, index)
+            index = values[index] - 1
+            length += 1
+            if length > 50:
+                return False
+    return True
+
+
+@numba.njit(numba.boolean(numba.int8[:], numba.int64), cache=True)
+def _random_prisoner_success(values: np.ndarray, prisoner: int) -> bool:
+    """
+    compiled random strategy for a single prisoner: he opens 50 boxes picked
+    at random among those he has not opened yet.
+
+    :param values: ticket values of the room, box i+1 stored at index i
+    :param prisoner: the prisoner's number
+    :return: success or failure of the prisoner
+    """
+
+    low = np.uint64(0)  # opened flags, see _is_marked
+    high = np.uint64(0)
+    for draw in range(50):
+        # pick the k-th unopened box
+        k = int(np.random.random() * (100 - draw))
+        index = 0
+        while True:
+            if not _is_marked(low, high, index):
+                if k == 0:
+                    break
+                k -= 1
+            index += 1
+        low, high = _mark(low, high, index)
+        if values[index] == prisoner:
+            return True
+    return False
+
+
+@numba.njit(numba.boolean(numba.int8[:]), cache=True)
+def _random_trial_success(values: np.ndarray) -> bool:
+    """
+    compiled run of the random strategy for all 100 prisoners.
+
+    :param values: ticket values of the room, box i+1 stored at index i
+    :return: True if all 100 prisoners found their tickets
+    """
+
+    for prisoner in range(1, 101):
+        if not _random_prisoner_success(values, prisoner):
+            return False
+    return True
+
+
+@numba.njit(numba.float64(numba.int64, numba.uint32[:], numba.boolean), cache=True, parallel=True)
+def _mc_kernel(num_samples: int, chunk_seeds: np.ndarray, follower: bool) -> float:
+    """
+    compiled monte carlo run, shuffling a fresh room and sending in all 100
+    prisoners for every sample. samples are spread over all available cores.
+    the strategy flag is checked once per sample; against a follower-only copy
+    of this loop it made no measurable difference (2M samples, ~2.0s each).
+
+    numba keeps its own random state per thread, apart from numpy's, so seeds
+    have to be passed in: each chunk of samples re-seeds its thread with its
+    own entry of chunk_seeds before drawing anything.
+
+    :param num_samples: number of rooms to simulate
+    :param chunk_seeds: one seed per chunk the samples are split into for prange,
+                        see _chunk_seeds
+    :param follower: True for the follower strategy, False for the random one
+    :return: fraction of rooms in which every prisoner found his ticket
+    """
+
+    # one room buffer per chunk of samples, reshuffled in place: shuffling a
+    # permutation uniformly gives a uniform permutation, so it never needs refilling
+    num_chunks = chunk_seeds.size
+    chunk_size = (num_samples + num_chunks - 1) // num_chunks
+    successes = 0
+    for chunk in numba.prange(num_chunks):
+        np.random.seed(chunk_seeds[chunk])
+        values = np.arange(1, 101, 1, np.int8)
+        for _ in range(chunk * chunk_size, min((chunk + 1) * chunk_size, num_samples)):
+            _shuffle_room(values)
+            if follower:
+                success = _follower_trial_success(values)
+            else:
+                success = _random_trial_success(values)
+            if success:
+                successes += 1
+    return successes / num_samples
 
 
 class BoxAlreadyOpened(Exception):
@@ -8,9 +210,11 @@ class BoxAlreadyOpened(Exception):
 
 class Box:
 
+    __slots__ = ('value', 'opened')
+
     def __init__(self, hidden_value: int):
 
-        if type(hidden_value) is not int:
+        if isinstance(hidden_value, bool) or not isinstance(hidden_value, (int, np.integer)):
             raise ValueError
         self.value = hidden_value
         self.opened = False
@@ -36,27 +240,29 @@ class Room:
 
     def __init__(self):
 
-        self.boxes = [Box(int(number)) for number in np.arange(1, 101)]
-        np.random.shuffle(self.boxes)
+        self.values = _RNG.permutation(_BOX_INDICES)
+        self.opened = np.zeros(100, dtype=bool)
+
+    def reset(self) -> None:
+        """
+        reshuffles the tickets in place and reseals every box, so that the
+        room can be reused for a new sample without reallocating it.
+        """
+
+        _RNG.shuffle(self.values)
+        self.opened.fill(False)
 
     def close_boxes(self) -> None:
 
-        for box in self.boxes:
-            box.reseal_box()
+        self.opened.fill(False)
 
     def count_boxes_opened(self) -> int:
 
-        counter = 0
-        for box in self.boxes:
-            if box.opened:
-                counter += 1
-
-        return counter
+        return int(self.opened.sum())
 
-    def get_unopened_boxes(self) -> list:
+    def get_unopened_boxes(self) -> np.ndarray:
 
-        open_indices = [index for index, box in zip(np.arange(1, 101), self.boxes) if box.opened is False]
-        return open_indices
+        return np.flatnonzero(~self.opened) + 1
 
     def open_box(self, index: int) -> int:
         """
@@ -66,10 +272,10 @@ class Room:
         :return: ticket number held within the box
         """
 
-        if self.boxes[index-1].opened:
+        if self.opened[index-1]:
             raise BoxAlreadyOpened(f"Box #{index-1} already opened")
-        else:
-            return self.boxes[index-1].open_box()
+        self.opened[index-1] = True
+        return int(self.values[index-1])
 
 
 class PrisonerStrategy:
@@ -82,19 +288,57 @@ class PrisonerStrategy:
                  prisoner_strat: Strategy = Strategy.RANDOM
                  ):
 
-        self.strat = (self.random_strategy if prisoner_strat == self.Strategy.RANDOM else
-                      self.follower_strategy)
+        # strat opens a single box, run_prisoner gives a whole prisoner his 50 tries.
+        # the follower's run_prisoner is the compiled kernel, so it does not go
+        # through strat; follower_strategy stays for opening boxes one at a time.
+        if prisoner_strat == self.Strategy.RANDOM:
+            self.strat = PrisonerStrategy.random_strategy
+            self.run_prisoner = PrisonerStrategy.random_prisoner
+        else:
+            self.strat = PrisonerStrategy.follower_strategy
+            self.run_prisoner = PrisonerStrategy.follower_prisoner
 
-    def random_strategy(self, room: Room, *args) -> int:
+    @staticmethod
+    def random_strategy(room: Room, *args) -> int:
 
-        available_boxes = room.get_unopened_boxes()
+        unopened = np.flatnonzero(~room.opened)
 
-        return room.open_box(np.random.choice(available_boxes))
+        return room.open_box(int(unopened[_RNG.integers(unopened.size)]) + 1)
 
-    def follower_strategy(self, room: Room, current_value: int) -> int:
+    @staticmethod
+    def follower_strategy(room: Room, current_value: int) -> int:
 
         return room.open_box(current_value)
 
+    @staticmethod
+    def random_prisoner(room: Room, prisoner_number: int) -> bool:
+        """
+        gives a single prisoner his 50 random tries to find the right box.
+
+        :return: success or failure of the prisoner
+        """
+
+        for _ in range(50):
+            if PrisonerStrategy.random_strategy(room) == prisoner_number:
+                return True
+        return False
+
+    @staticmethod
+    def follower_prisoner(room: Room, prisoner_number: int) -> bool:
+        """
+        gives a single prisoner his 50 tries to find the right box by following
+        the tickets, running the compiled follower kernel.
+
+        :return: success or failure of the prisoner
+        """
+
+        if not 1 <= prisoner_number <= 100:
+            raise IndexError(f"prisoner #{prisoner_number} has no box in the room")
+        outcome = _follower_run(room.values, room.opened, prisoner_number)
+        if outcome < 0:
+            raise BoxAlreadyOpened(f"Box #{-outcome-1} already opened")
+        return outcome == 1
+
 
 class World:
 
@@ -103,7 +347,7 @@ class World:
         self.prisoner_strategy = PrisonerStrategy(prisoner_strategy)
 
     def reset(self) -> None:
-        self.room = Room()
+        self.room.reset()
 
     def run_single_prisoner_instance(self, prisoner_number=24601) -> bool:
         """
@@ -112,13 +356,8 @@ class World:
 
         :return: success or failure of the prisoner
         """
-        current_value = prisoner_number
-        for _ in range(50):
-            uncovered_value = self.prisoner_strategy.strat(self.room, current_value)
-            if uncovered_value == prisoner_number:
-                return True
-            current_value = uncovered_value
-        return False
+
+        return self.prisoner_strategy.run_prisoner(self.room, prisoner_number)
 
     def run_single_strategy_instance(self) -> bool:
         """
@@ -126,7 +365,7 @@ class World:
         if every prisoner attempt is successful, returning False at the first failure
         """
 
-        for index in np.arange(1, 101):
+        for index in range(1, 101):
             success = self.run_single_prisoner_instance(prisoner_number=index)
             if not success:
                 return False
@@ -135,19 +374,38 @@ class World:
         return True
 
 
-def monte_carlo_test(num_samples: int = 1000,
-                     strategy: PrisonerStrategy.Strategy = PrisonerStrategy.Strategy.RANDOM
-                     ) -> float:
+def _chunk_seeds(random_seed: Optional[int], num_chunks: int) -> np.ndarray:
+    """
+    derives independent seeds for the chunks of a monte carlo run, so that
+    neighbouring user seeds do not share chunk streams.
+
+    :param random_seed: non-negative seed, or None for fresh entropy
+    :param num_chunks: number of chunks to seed
+    :return: uint32 array holding one seed per chunk
+    """
+
+    return np.random.SeedSequence(random_seed).generate_state(num_chunks)
 
-    world = World(prisoner_strategy=strategy)
-    results = []
-    for _ in range(num_samples):
-        world.reset()
-        result = world.run_single_strategy_instance()
-        results.append(result)
 
-    successes = np.sum(results)
-    return successes / len(results)
+def monte_carlo_test(num_samples: int = 1000,
+                     strategy: PrisonerStrategy.Strategy = PrisonerStrategy.Strategy.RANDOM,
+                     random_seed: Optional[int] = None
+                     ) -> float:
+    """
+    estimates the success chance of a strategy over many randomly filled rooms.
+
+    :param num_samples: number of rooms to simulate
+    :param strategy: the strategy every prisoner follows
+    :param random_seed: non-negative seed making the run repeatable; numpy's
+                        np.random.seed and seed() do not reach the compiled kernels
+    :return: fraction of rooms in which every prisoner found his ticket
+    """
+
+    # a fixed chunk count keeps seeded runs identical on any machine, and is
+    # enough to spread the work over any realistic number of cores
+    num_chunks = max(1, min(num_samples, _NUM_CHUNKS))
+    return _mc_kernel(num_samples, _chunk_seeds(random_seed, num_chunks),
+                      strategy == PrisonerStrategy.Strategy.FOLLOWER)
 
 
 if __name__ == '__main__':
@@ -1,4 +1,5 @@
 from unittest import TestCase
+import numba
 import numpy as np
 
 from BoxSim import (
@@ -6,7 +7,14 @@ from BoxSim import (
    Room,
    BoxAlreadyOpened,
    PrisonerStrategy,
-   World
+   World,
+   seed,
+   _BOX_INDICES,
+   monte_carlo_test,
+   _follower_trial_success,
+   _random_prisoner_success,
+   _random_trial_success,
+   _chunk_seeds
 )
 
 
@@ -27,9 +35,14 @@ class Boxtest(TestCase):
             self.assertEqual(random_number, my_box.value, 'box creation failed')
             self.assertFalse(my_box.opened, 'box is not sealed')
 
+        # numpy integer scalars are accepted as well
+        for number in _BOX_INDICES:
+            self.assertEqual(number, Box(number).value, 'numpy integer box creation failed')
+
         # error if invalid type passed
         self.assertRaises(ValueError, Box, 2.5)
         self.assertRaises(ValueError, Box, 'bunnies')
+        self.assertRaises(ValueError, Box, True)
 
     def test_open_box(self):
         """
@@ -50,7 +63,7 @@ class Roomtest(TestCase):
         creates a default, repeatable room
         """
 
-        np.random.seed(42)
+        seed(42)
         self.my_room = Room()
 
     def test_room_creation(self):
@@ -61,14 +74,24 @@ class Roomtest(TestCase):
         runs each test 100 times to be sure of the results
         """
 
-        truevals = np.arange(1, 101)
         for _ in range(100):
             my_room = Room()
-            self.assertEqual(len(my_room.boxes), 100, 'incorrect number of rooms created')
-            box_values = [box.open_box() for box in my_room.boxes]
-            self.assertEqual(len(np.unique(box_values)), 100, 'non-unique boxes created')
-            evals = np.sort(box_values) == truevals
-            self.assertEqual(np.min(evals), 1, 'incorrect box values stored')
+            self.assertEqual(my_room.values.size, 100, 'incorrect number of rooms created')
+            self.assertEqual(len(np.unique(my_room.values)), 100, 'non-unique boxes created')
+            self.assertTrue(np.array_equal(np.sort(my_room.values), _BOX_INDICES), 'incorrect box values stored')
+
+    def test_room_reset(self):
+        """
+        tests that a reset room reseals every box and still holds each ticket
+        from 1 to 100 exactly once
+        """
+
+        my_room = Room()
+        for box_index in range(1, 61):
+            _ = my_room.open_box(box_index)
+        my_room.reset()
+        self.assertEqual(my_room.count_boxes_opened(), 0, 'boxes not sealed on reset')
+        self.assertTrue(np.array_equal(np.sort(my_room.values), _BOX_INDICES), 'incorrect box values after reset')
 
     def test_open_box_count(self):
         """
@@ -76,9 +99,9 @@ class Roomtest(TestCase):
         """
 
         my_room = Room()
-        test_boxes = [1, 34, 78]
+        test_boxes = [2, 35, 79]
         for box_index in test_boxes:
-            _ = my_room.boxes[box_index].open_box()
+            _ = my_room.open_box(box_index)
         self.assertEqual(my_room.count_boxes_opened(), 3, 'incorrect number of boxes counted')
 
     def test_reseal_boxes(self):
@@ -89,10 +112,10 @@ class Roomtest(TestCase):
         """
 
         my_room = Room()
-        box_array = np.arange(0, 100)
+        box_array = np.arange(1, 101)
         box_choices = np.random.choice(box_array, 60, replace=False)
         for box_index in box_choices:
-            _ = my_room.boxes[box_index].open_box()
+            _ = my_room.open_box(box_index)
         self.assertEqual(my_room.count_boxes_opened(), 60, 'boxes not opened appropriately')
         my_room.close_boxes()
         self.assertEqual(my_room.count_boxes_opened(), 0, 'boxes not correctly sealed')
@@ -108,9 +131,10 @@ class Roomtest(TestCase):
         for removal_index in testing_indices:
             remaining_indices = remaining_indices[remaining_indices != removal_index]
         for index in testing_indices:
-            _ = my_room.boxes[index-1].open_box()
+            _ = my_room.open_box(index)
 
         self.assertTrue(np.all(remaining_indices == my_room.get_unopened_boxes()), "incorrect unopened boxes returned")
+        self.assertEqual((my_room.get_unopened_boxes() + 100)[-1], 200, "unopened box numbers overflow")
 
     def test_open_box_in_room(self):
         """
@@ -119,8 +143,8 @@ class Roomtest(TestCase):
         """
 
         test_index = 34
-        test_value = self.my_room.boxes[test_index-1].open_box()
-        self.assertEqual(test_value, 29, 'incorrect ticket drawn')
+        test_value = self.my_room.open_box(test_index)
+        self.assertEqual(test_value, 47, 'incorrect ticket drawn')
         self.assertRaises(BoxAlreadyOpened, self.my_room.open_box, test_index)
 
 
@@ -131,20 +155,20 @@ class PrisonerTest(TestCase):
         create a dummy room to be used in the test
         """
 
-        np.random.seed(42)
+        seed(42)
         self.room = Room()
 
     def test_random_strategy(self):
 
-        np.random.seed(42)
+        seed(42)
         prisoners = PrisonerStrategy(PrisonerStrategy.Strategy.RANDOM)
         drawn_tickets = [prisoners.strat(self.room) for _ in range(5)]
-        target_tickets = [4, 83, 91, 49, 55]
+        target_tickets = [93, 89, 10, 6, 90]
         self.assertEqual(drawn_tickets, target_tickets, f"incorrect tickets drawn: {drawn_tickets}")
 
     def test_follower_strategy(self):
 
-        np.random.seed(42)
+        seed(42)
         prisoners = PrisonerStrategy(PrisonerStrategy.Strategy.FOLLOWER)
         prisoner_number = 42
         drawn_tickets = []
@@ -152,7 +176,7 @@ class PrisonerTest(TestCase):
         for _ in range(5):
             drawn_tickets.append(prisoners.strat(self.room, current_value=current_value))
             current_value = drawn_tickets[-1]
-        target_tickets = [35, 94, 83, 38, 66]
+        target_tickets = [41, 92, 13, 25, 8]
         self.assertEqual(drawn_tickets, target_tickets, f"incorrect tickets drawn: {drawn_tickets}")
 
 
@@ -160,7 +184,7 @@ class WorldTest(TestCase):
 
     def setUp(self) -> None:
 
-        np.random.seed(42)
+        seed(42)
         self.world = World(PrisonerStrategy.Strategy.RANDOM)
         # self.random_prisoner = PrisonerStrategy(PrisonerStrategy.Strategy.RANDOM)
         # self.follower_prisoner = PrisonerStrategy(PrisonerStrategy.Strategy.RANDOM)
@@ -172,3 +196,127 @@ class WorldTest(TestCase):
         self.assertEqual(len(self.world.room.get_unopened_boxes()), 95, "world boxes not opened correctly")
         self.world.reset()
         self.assertEqual(len(self.world.room.get_unopened_boxes()), 100, "world boxes not reset correctly")
+
+    def test_follower_prisoner_instance(self) -> None:
+        """
+        tests that a follower prisoner succeeds when his box holds his own
+        ticket, and fails after 50 boxes when every box points to the next one
+        """
+
+        world = World(PrisonerStrategy.Strategy.FOLLOWER)
+        world.room.values = np.arange(1, 101, dtype=np.int8)
+        self.assertTrue(world.run_single_prisoner_instance(prisoner_number=7), "prisoner missed his own box")
+        self.assertEqual(world.room.count_boxes_opened(), 1, "follower opened too many boxes")
+
+        world.room.close_boxes()
+        world.room.values = np.roll(np.arange(1, 101, dtype=np.int8), -1)
+        self.assertFalse(world.run_single_prisoner_instance(prisoner_number=7), "prisoner beat a 100-cycle")
+        self.assertEqual(world.room.count_boxes_opened(), 50, "follower did not use all 50 tries")
+
+    def test_follower_prisoner_errors(self) -> None:
+        """
+        tests that a follower prisoner without a box in the room raises an IndexError,
+        and that one running into an already opened box raises BoxAlreadyOpened
+        """
+
+        world = World(PrisonerStrategy.Strategy.FOLLOWER)
+        self.assertRaises(IndexError, world.run_single_prisoner_instance)
+        self.assertRaises(IndexError, world.run_single_prisoner_instance, prisoner_number=0)
+
+        world.room.values = np.roll(np.arange(1, 101, dtype=np.int8), -1)
+        _ = world.room.open_box(10)
+        self.assertRaises(BoxAlreadyOpened, world.run_single_prisoner_instance, prisoner_number=7)
+        self.assertRaises(BoxAlreadyOpened, world.run_single_prisoner_instance, prisoner_number=10)
+
+
+@numba.njit
+def _seeded_random_trial(values: np.ndarray, seed_value: int) -> bool:
+    """
+    runs _random_trial_success after seeding numba's random state, which cannot
+    be reached from python
+    """
+
+    np.random.seed(seed_value)
+    return _random_trial_success(values)
+
+
+
+class MonteCarloTest(TestCase):
+
+    def test_follower_success_chance(self) -> None:
+        """
+        tests that the follower strategy lands near its known success chance of
+        1 - (1/51 + 1/52 + ... + 1/100), roughly 31.18%
+        """
+
+        expected = 1 - np.sum(1 / np.arange(51, 101))
+        success_chance = monte_carlo_test(num_samples=20000, strategy=PrisonerStrategy.Strategy.FOLLOWER)
+        self.assertAlmostEqual(success_chance, expected, delta=0.02, msg="follower success chance is off")
+
+    def test_seeded_runs_repeat(self) -> None:
+        """
+        tests that two runs with the same seed give the same result
+        """
+
+        for strategy in PrisonerStrategy.Strategy:
+            first = monte_carlo_test(num_samples=5000, strategy=strategy, random_seed=1)
+            second = monte_carlo_test(num_samples=5000, strategy=strategy, random_seed=1)
+            self.assertEqual(first, second, f"seeded {strategy.name} runs differ")
+
+    def test_chunk_seeds(self) -> None:
+        """
+        tests that neighbouring seeds share no chunk seeds, that unseeded runs
+        draw fresh ones, and that negative seeds are refused
+        """
+
+        first = _chunk_seeds(1, 256)
+        second = _chunk_seeds(2, 256)
+        self.assertEqual(first.dtype, np.uint32, "chunk seeds are not uint32")
+        self.assertTrue(np.array_equal(first, _chunk_seeds(1, 256)), "chunk seeds do not repeat")
+        self.assertFalse(set(first.tolist()) & set(second.tolist()), "neighbouring seeds share chunk seeds")
+        self.assertFalse(np.array_equal(_chunk_seeds(None, 256), _chunk_seeds(None, 256)), "unseeded chunk seeds repeat")
+        self.assertRaises(ValueError, monte_carlo_test, 10, PrisonerStrategy.Strategy.FOLLOWER, -5)
+
+    def test_random_success_chance(self) -> None:
+        """
+        tests that the random strategy never succeeds end to end, its success
+        chance being 1/2 ** 100
+        """
+
+        success_chance = monte_carlo_test(num_samples=1000, strategy=PrisonerStrategy.Strategy.RANDOM, random_seed=3)
+        self.assertEqual(success_chance, 0.0, "random strategy succeeded")
+
+    def test_random_trial_success(self) -> None:
+        """
+        tests that a seeded random run fails on a room where every prisoner's
+        ticket sits in his own box: each prisoner still has only a 1/2 chance
+        """
+
+        identity = np.arange(1, 101, dtype=np.int8)
+        for seed_value in range(10):
+            self.assertFalse(_seeded_random_trial(identity, seed_value), f"random run succeeded with seed {seed_value}")
+
+    def test_random_prisoner_success(self) -> None:
+        """
+        tests that a random prisoner opening 50 of the 100 boxes finds his ticket
+        about half the time
+        """
+
+        values = np.arange(1, 101, dtype=np.int8)
+        num_rooms = 100000
+        hits = sum(_random_prisoner_success(values, 42) for _ in range(num_rooms))
+        self.assertAlmostEqual(hits / num_rooms, 0.5, delta=0.01, msg="random prisoner hit rate is off")
+
+    def test_follower_trial_success(self) -> None:
+        """
+        tests the cycle-length shortcut on hand-built rooms: the identity and two
+        50-cycles succeed, a single 100-cycle and a 51-cycle fail
+        """
+
+        identity = np.arange(1, 101, dtype=np.int8)
+        self.assertTrue(_follower_trial_success(identity), "identity room failed")
+        two_halves = np.concatenate((np.roll(np.arange(1, 51, dtype=np.int8), -1), np.roll(np.arange(51, 101, dtype=np.int8), -1)))
+        self.assertTrue(_follower_trial_success(two_halves), "two 50-cycles failed")
+        self.assertFalse(_follower_trial_success(np.roll(identity, -1)), "100-cycle succeeded")
+        long_cycle = np.concatenate((np.roll(np.arange(1, 52, dtype=np.int8), -1), np.arange(52, 101, dtype=np.int8)))
+        self.assertFalse(_follower_trial_success(long_cycle), "51-cycle succeeded")